@@ -1,39 +1,115 @@
 import asyncio
+import io
 import os
+import re
+import sys
+import time
+from collections import OrderedDict, deque
 from typing import Optional
 from contextlib import AsyncExitStack
-import json
 
-from mcp import ClientSession, StdioServerParameters
+import httpx
+import orjson
+from mcp import ClientSession, StdioServerParameters, types
 from mcp.client.streamable_http import streamablehttp_client
 from mcp.client.stdio import stdio_client
 from mcp.client.sse import sse_client
 
-import time
 from openai import AsyncOpenAI
-from groq import Groq
+from config import config
 from dotenv import load_dotenv
 
+try:
+    import uvloop  # optional: faster event loop on Linux/macOS
+except ImportError:
+    uvloop = None
+
 load_dotenv()
 
+# Tool result cache: only informational (read-only) tools are cached, command tools always run
+TOOL_RESULT_CACHE_SIZE = 256
+DEFAULT_TOOL_RESULT_TTL = 600  # seconds
+TOOL_RESULT_TTL = {
+    "get_time": 0,        # always changes, never cache
+    "get_forecast": 300,
+    "get_alerts": 300,
+}
+# Tools are left out of the request after this many consecutive queries without tool use.
+# Queries sent without tools cannot use them, so only the probe every TOOL_PROBE_INTERVAL queries,
+# which includes the tools, can bring the client back to sending them on every turn
+TOOL_PROBE_WINDOW = 5
+TOOL_PROBE_INTERVAL = 10
+# Verbs match as whole words; letter lookarounds instead of \b so snake_case names like get_time still match
+COMMAND_TOOL_RE = re.compile(r"(?<![a-z])(send|create|delete|remove|update|write|post|execute|exec|run|invoke)(?![a-z])", re.IGNORECASE)
+INFORMATIONAL_TOOL_RE = re.compile(r"(?<![a-z])(get|list|search|read|fetch)(?![a-z])", re.IGNORECASE)
+# Verbs that may or may not have side effects (e.g. "run a query"): such tools are never cached
+AMBIGUOUS_TOOL_RE = re.compile(r"(?<![a-z])(query|call|process|apply|handle)(?![a-z])", re.IGNORECASE)
+
 def is_gpt_oss(model: str) -> bool:
     return isinstance(model, str) and model.startswith("openai/gpt-oss")
 
+async def ainput(prompt: str) -> str:
+    """Read a line from stdin in a worker thread so the event loop keeps running."""
+    return await asyncio.to_thread(input, prompt)
+
+def is_command_tool(tool) -> bool:
+    """Classify a tool as a command (may have side effects) from its name and description."""
+    return bool(COMMAND_TOOL_RE.search(f"{tool.name} {tool.description or ''}"))
+
+def is_informational_tool(tool) -> bool:
+    """Classify a tool as informational (safe to cache) from its name and description."""
+    text = f"{tool.name} {tool.description or ''}"
+    return not is_command_tool(tool) and not AMBIGUOUS_TOOL_RE.search(text) and bool(INFORMATIONAL_TOOL_RE.search(text))
+
 class MCPClient:
     def __init__(self):
+        # Environment settings are read once at startup
+        self._model = os.getenv("MODEL")
+        self._print_all = os.getenv("PRINT_ALL_MODEL_OUTPUT", "false").lower() == "true"
+        self._transport = os.getenv("TRANSPORT", "stdio").lower()
+        self._reasoning_effort = os.getenv("GPT_OSS_REASONING", "medium")
+        self._is_gpt_oss = is_gpt_oss(self._model)
+
         # Initialize session and client objects
         self.session: Optional[ClientSession] = None
         self.exit_stack = AsyncExitStack()
-        self.client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        # Tool definitions are cached after connecting and refreshed only when the server says they changed
+        self._tools_cache = []
+        self._available_tools = []
+        self._tools_stale = True
+        # Bumped on every invalidation; a refresh that started before the bump does not mark the cache fresh
+        self._tools_generation = 0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._informational_tools = set()
+        self._command_tools = set()
+        # LRU of (tool_name, canonical args) -> (expires_at, tool_content)
+        self._tool_result_cache = OrderedDict()
+        # 1 if a query used tools, 0 otherwise, for the last TOOL_PROBE_WINDOW queries
+        self._recent_tool_uses = deque(maxlen=TOOL_PROBE_WINDOW)
+        self._query_count = 0
+        # Bounds how many tool calls are in flight on the MCP session at once
+        self._tool_sem = asyncio.Semaphore(int(os.getenv("MAX_TOOL_CONCURRENCY", "5")))
+        # One pooled HTTP/2 connection set for every model call, so TLS handshakes are not repeated per turn
+        self._http = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=64, max_connections=128),
+            timeout=httpx.Timeout(config.REQUEST_TIMEOUT, connect=5.0)
+        )
+        # Groq is reached through its OpenAI-compatible endpoint with the async OpenAI SDK
+        self.client = AsyncOpenAI(
+            api_key=os.getenv("GROQ_API_KEY"),
+            base_url="https://api.groq.com/openai/v1",
+            http_client=self._http
+        )
         self.messages = [
             {
                 "role": "system",
                 "content": "You are an agentic assistant that can use tools. Planning rule: Privately plan the solution first. If tools are needed and their inputs are known, emit all required tool calls in one turn. No redundant calls: Do not call the same tool twice with identical arguments. Idempotence: Prefer arguments that make calls idempotent and cache-friendly. Termination: – If no tool is needed, answer directly. – After tool results are returned (role:tool), either batch any remaining calls (if now fully specified) or produce a clear final answer. – If information is insufficient even after tools, explain what’s missing and stop. Output contract: Never emit additional tool calls after your final answer."
             }
         ]
+        # System messages are static text (no timestamps) so every request shares the same cacheable prefix
         # Add a small Harmony nudge only when using GPT-OSS
-        model = os.getenv("MODEL")
-        if is_gpt_oss(model):
+        if self._is_gpt_oss:
             self.messages.append({
                 "role": "system",
                 "content": "Think privately if needed. Then ALWAYS provide a clear final answer in the assistant message body."
@@ -43,123 +119,205 @@ class MCPClient:
                 "role": "system",
                 "content": "Batching rule: Prefer one batched turn with multiple tool calls over multiple incremental turns. When not to batch: If a later tool’s inputs depend on the output of an earlier tool, call only the prerequisite tools first; otherwise batch."
             })
+        # Frozen snapshot of the system preamble that every query starts from
+        self._messages_base = tuple(self.messages)
+        self._kwargs_template = self._build_kwargs_template(self._model)
+        self._connectors = {
+            "sse": self._connect_sse,
+            "streamable-http": self._connect_http,
+            "stdio": self._connect_stdio,
+        }
+
+    async def _connect_sse(self, url: str):
+        """Open the MCP session over SSE."""
+        sse_transport = await self.exit_stack.enter_async_context(
+            sse_client(url)
+        )
+        self.session = await self.exit_stack.enter_async_context(
+            ClientSession(sse_transport[0], sse_transport[1], message_handler=self._handle_server_message)
+        )
+
+    async def _connect_http(self, url: str):
+        """Open the MCP session over streamable-http."""
+        http_transport = await self.exit_stack.enter_async_context(
+            streamablehttp_client(url)
+        )
+        self.session = await self.exit_stack.enter_async_context(
+            ClientSession(http_transport[0], http_transport[1], message_handler=self._handle_server_message)
+        )
+
+    async def _connect_stdio(self, server_path: str):
+        """Spawn the server script and open the MCP session over its STDIO."""
+        is_python = server_path.endswith('.py')
+        is_js = server_path.endswith('.js')
+        if not (is_python or is_js):
+            raise ValueError("For STDIO transport, server must be a .py or .js file")
+            
+        command = "python" if is_python else "node"
+        server_params = StdioServerParameters(
+            command=command,
+            args=[server_path],
+            env=None
+        )
+        
+        stdio_transport = await self.exit_stack.enter_async_context(stdio_client(server_params))
+        self.stdio, self.write = stdio_transport
+        self.session = await self.exit_stack.enter_async_context(ClientSession(self.stdio, self.write, message_handler=self._handle_server_message))
+
+    def _build_kwargs_template(self, model: str) -> dict:
+        """Build the chat completion kwargs shared by every call for a model."""
+        kwargs = {"model": model, "temperature": 1.1, "max_tokens": 1000, "stream": True}
+        if is_gpt_oss(model):
+            kwargs["reasoning_effort"] = self._reasoning_effort
+        return kwargs
 
     async def connect_to_server(self, server_path_or_url: str):
-        """Connect to an MCP server via STDIO or SSE based on TRANSPORT env variable
+        """Connect to an MCP server via STDIO, SSE or streamable-http based on TRANSPORT env variable
         
         Args:
-            server_path_or_url: Path to server script for STDIO or URL for SSE
+            server_path_or_url: Path to server script for STDIO or URL for SSE / streamable-http
         """
-        transport = os.getenv("TRANSPORT", "stdio").lower()
-        
-        if transport == "sse":
-            # Connect via SSE
-            sse_transport = await self.exit_stack.enter_async_context(
-                sse_client(server_path_or_url)
-            )
-            self.session = await self.exit_stack.enter_async_context(
-                ClientSession(sse_transport[0], sse_transport[1])
-            )
-        
-        elif transport == 'streamable-http':
-            http_transport = await self.exit_stack.enter_async_context(
-                streamablehttp_client(server_path_or_url)
-            )
-            self.session = await self.exit_stack.enter_async_context(
-                ClientSession(http_transport[0], http_transport[1])
-            )
-        
-        elif transport == "stdio":
-            # Connect via STDIO (code existant)
-            is_python = server_path_or_url.endswith('.py')
-            is_js = server_path_or_url.endswith('.js')
-            if not (is_python or is_js):
-                raise ValueError("For STDIO transport, server must be a .py or .js file")
-                
-            command = "python" if is_python else "node"
-            server_params = StdioServerParameters(
-                command=command,
-                args=[server_path_or_url],
-                env=None
-            )
-            
-            stdio_transport = await self.exit_stack.enter_async_context(stdio_client(server_params))
-            self.stdio, self.write = stdio_transport
-            self.session = await self.exit_stack.enter_async_context(ClientSession(self.stdio, self.write))
-            
-        else:
-            raise ValueError(f"Unsupported transport: {transport}. Use 'stdio' or 'sse'")
+        transport = self._transport
+        try:
+            connector = self._connectors[transport]
+        except KeyError:
+            raise ValueError(f"Unsupported transport: {transport}. Use 'stdio', 'sse' or 'streamable-http'") from None
+
+        await connector(server_path_or_url)
         
         await self.session.initialize()
         
         # List available tools
-        response = await self.session.list_tools()
-        tools = response.tools
-        print("Model :", os.getenv("MODEL"))
-        print("Reasoning :", os.getenv("GPT_OSS_REASONING", "medium")) if is_gpt_oss(os.getenv("MODEL")) else None
+        tools = await self._refresh_tools()
+        print("Model :", self._model)
+        print("Reasoning :", self._reasoning_effort) if self._is_gpt_oss else None
         print(f"Connected via {transport} to server with tools:", [tool.name for tool in tools])
 
+    async def _refresh_tools(self) -> list:
+        """Fetch the server's tools and rebuild the tool payload sent to the model."""
+        generation = self._tools_generation
+        response = await self.session.list_tools()
+        self._tools_cache = response.tools
+        # Sorted by name so the tool prefix stays byte-identical across refreshes and hits the provider's prompt cache
+        self._available_tools = [{"type": "function", "function": {"name": tool.name, "description": tool.description, "parameters": tool.inputSchema}} for tool in sorted(response.tools, key=lambda t: t.name)]
+        self._informational_tools = {tool.name for tool in response.tools if is_informational_tool(tool)}
+        self._command_tools = {tool.name for tool in response.tools if is_command_tool(tool)}
+        if generation == self._tools_generation:
+            self._tools_stale = False
+        return self._tools_cache
+
+    async def invalidate_tools(self) -> None:
+        """Drop the cached tool definitions and results; tools are listed again on the next query.
+        For callers that know the server's tool schemas changed without a list_changed notification."""
+        self._cancel_refresh()
+        if self._refresh_task is not None:
+            # Wait for the cancelled refresh so it cannot mark the cache fresh after this call
+            await asyncio.wait({self._refresh_task})
+        self._tools_generation += 1
+        self._tools_stale = True
+        self._tool_result_cache.clear()
+
+    def _cancel_refresh(self) -> None:
+        """Cancel a background tools refresh that started before the tools changed."""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+
+    def _prefetch_tools(self) -> None:
+        """Refresh a stale tools cache in the background, e.g. while waiting for user input."""
+        if self._tools_stale and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._refresh_tools())
+            # A failed prefetch only leaves the cache stale (the next query refreshes it); retrieve the error
+            # so it is not reported as "Task exception was never retrieved"
+            self._refresh_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def _handle_server_message(self, message) -> None:
+        """Mark the tools cache stale when the server announces a tool list change.
+        The refresh itself happens on the next query, since requests cannot be awaited from the receive loop."""
+        if isinstance(message, types.ServerNotification) and isinstance(message.root, types.ToolListChangedNotification):
+            # A refresh already in flight may return the old list; drop it so it cannot clear the stale flag
+            self._cancel_refresh()
+            self._tools_generation += 1
+            self._tools_stale = True
+
     async def process_and_print(self, model: str, messages: list, available_tools: list, print_all_output: bool):
         """Process user query or model's past reasoning and tool calls and prints response as it gets generated.
         The model returns its thinking and its answer.
         We only return its answer and tool calls.
         If no answer, we return the thinking as its answer."""
-        # Prepare common kwargs; add Harmony options if GPT-OSS
-        kwargs = dict(
-            model=model,
-            messages=messages,
-            temperature=1.1,
-            max_tokens=1000,
-            stream=True
-        )
+        gpt_oss = is_gpt_oss(model)
+
+        # Start from the prebuilt kwargs for the configured model; Harmony options are already in it for GPT-OSS
+        template = self._kwargs_template if model == self._model else self._build_kwargs_template(model)
+        kwargs = {**template, "messages": messages}
         if available_tools is not None:
             kwargs["tools"] = available_tools
 
-        if is_gpt_oss(model):
-            kwargs["reasoning_effort"] = os.getenv("GPT_OSS_REASONING", "medium")
-
-        stream = self.client.chat.completions.create(**kwargs)
+        stream = await self.client.chat.completions.create(**kwargs)
         
         # Variables pour gérer le streaming
-        response_message_chunks = []
+        response_buf = io.StringIO()
         tool_calls = []
         # Optionally capture reasoning chunks (kept internal)
-        reasoning_chunks = []
+        reasoning_buf = io.StringIO()
+
+        # Streamed tokens are written to stdout without per-token flushing;
+        # flushed every 16 chunks or 50 ms, whichever comes first
+        write = sys.stdout.write
+        flush = sys.stdout.flush
+        monotonic = time.monotonic
+        chunks_since_flush = 0
+        last_flush = monotonic()
+        # Bound methods hoisted out of the per-chunk loop
+        write_response = response_buf.write
+        write_reasoning = reasoning_buf.write
+        extend_tool_calls = tool_calls.extend
 
         is_reasoning=True
-        for chunk in stream:
+        async for chunk in stream:
             delta = chunk.choices[0].delta
 
             # Visible content
-            if delta.content is not None:
-                content_chunk = delta.content
-                response_message_chunks.append(content_chunk)
+            content_chunk = delta.content
+            if content_chunk is not None:
+                write_response(content_chunk)
                 if print_all_output:
                     if not is_reasoning:
-                        print("\n\nResponse:", end=" ")
+                        write("\n\nResponse: ")
                         is_reasoning=True
-                    print(content_chunk, end="")
+                    write(content_chunk)
+                    chunks_since_flush += 1
 
             # Reasoning stream (GPT-OSS)
-            if hasattr(delta, "reasoning") and delta.reasoning:
-                reasoning_chunks.append(delta.reasoning)
+            reasoning = getattr(delta, "reasoning", None) if gpt_oss else None
+            if reasoning:
+                write_reasoning(reasoning)
                 if print_all_output:
                     if is_reasoning:
-                        print("Reasoning:", end=" ")
+                        write("Reasoning: ")
                         is_reasoning=False
-                    print(delta.reasoning, end="")
+                    write(reasoning)
+                    chunks_since_flush += 1
 
             # Tool calls
-            if delta.tool_calls:
-                tool_calls.extend(delta.tool_calls)
+            delta_tool_calls = delta.tool_calls
+            if delta_tool_calls:
+                extend_tool_calls(delta_tool_calls)
+
+            if chunks_since_flush:
+                now = monotonic()
+                if chunks_since_flush >= 16 or now - last_flush > 0.05:
+                    flush()
+                    chunks_since_flush = 0
+                    last_flush = now
 
         if print_all_output:
-            print()  # Retour à la ligne final
+            write("\n")  # Retour à la ligne final
+            flush()
 
         # Assembler le contenu complet
-        response_message = "".join(response_message_chunks).strip()
+        response_message = response_buf.getvalue().strip()
         if not response_message:
-            response_message = "Reasoning : " + "".join(reasoning_chunks).strip()
+            response_message = "Reasoning : " + reasoning_buf.getvalue().strip()
 
         assistant_msg = {"role": "assistant", "content": response_message}
         
@@ -185,35 +343,75 @@ class MCPClient:
         
         try:
             # Parse JSON string to dict more safely
-            tool_args = json.loads(tool_call.function.arguments)
-        except (json.JSONDecodeError, ValueError) as e:
+            tool_args = orjson.loads(tool_call.function.arguments)
+        except (orjson.JSONDecodeError, ValueError) as e:
             if print_all_output:
                 print(f"Warning: Failed to parse {tool_name} arguments: {e}")
             tool_args = {}
 
+        # Serve informational tools from the cache when the same arguments were seen recently
+        ttl = TOOL_RESULT_TTL.get(tool_name, DEFAULT_TOOL_RESULT_TTL)
+        cacheable = tool_name in self._informational_tools and ttl > 0
+        if cacheable:
+            cache_key = (tool_name, orjson.dumps(tool_args, option=orjson.OPT_SORT_KEYS))
+            cached = self._tool_result_cache.get(cache_key)
+            if cached is not None:
+                expires_at, tool_content = cached
+                if expires_at > time.monotonic():
+                    self._tool_result_cache.move_to_end(cache_key)
+                    if print_all_output:
+                        print(f"[Cache hit:] {tool_name}")
+                    return tool_content
+                del self._tool_result_cache[cache_key]
+
         # Execute tool call
+        failed = False
         try:
-            result = await self.session.call_tool(tool_name, tool_args)
-            tool_result = [result.content[i].text for i in range(len(result.content))] if hasattr(result, 'content') else str(result)
+            async with self._tool_sem:
+                result = await self.session.call_tool(tool_name, tool_args)
+            if hasattr(result, 'content'):
+                # A single text part is passed through as is; only multi-part results are JSON-encoded
+                tool_result = result.content[0].text if len(result.content) == 1 else [c.text for c in result.content]
+            else:
+                tool_result = str(result)
+            failed = bool(getattr(result, 'isError', False))
         except Exception as e:
             if print_all_output:
                 print(f"Error executing tool {tool_call.function.name}: {str(e)}")
             tool_result = f"[tool_error] {e}"
+            failed = True
 
         # Stringify content (Harmony/Chat Completions expects a string)
         if isinstance(tool_result, (dict, list)):
-            tool_content = json.dumps(tool_result, ensure_ascii=False)
+            tool_content = orjson.dumps(tool_result).decode()
         else:
             tool_content = "" if tool_result is None else str(tool_result)
+
+        if cacheable and not failed:
+            self._tool_result_cache[cache_key] = (time.monotonic() + ttl, tool_content)
+            if len(self._tool_result_cache) > TOOL_RESULT_CACHE_SIZE:
+                self._tool_result_cache.popitem(last=False)
             
         return tool_content
 
     async def process_query(self, query: str, model: str, print_all_output: bool, max_iters: int=8) -> str:
         """Process a query using Groq (OpenAI-compatible) and MCP tools in an agent loop."""
-        messages = list(self.messages) + [{"role": "user", "content": query}]
-
-        tools_list = await self.session.list_tools()
-        available_tools = [{"type": "function", "function": {"name": tool.name, "description": tool.description, "parameters": tool.inputSchema}} for tool in tools_list.tools]
+        # Built in one allocation; the agent loop then appends to this list in place
+        messages = [*self._messages_base, {"role": "user", "content": query}]
+
+        if self._refresh_task is not None and not self._refresh_task.done():
+            await asyncio.wait({self._refresh_task})
+        if self._tools_stale:
+            await self._refresh_tools()
+        self._query_count += 1
+        skip_tools = (
+            len(self._recent_tool_uses) == TOOL_PROBE_WINDOW
+            and not any(self._recent_tool_uses)
+            and self._query_count % TOOL_PROBE_INTERVAL != 0
+        )
+        available_tools = None if skip_tools else self._available_tools
+        if skip_tools and print_all_output:
+            print(f"[agent] no tool use in the last {TOOL_PROBE_WINDOW} queries; sending this one without tools.")
         
         for step in range(max_iters):
             if print_all_output:
@@ -227,34 +425,51 @@ class MCPClient:
             if not tool_calls:
                 if not print_all_output:
                     print("Final Response: ", assistant_msg["content"])
-                return
+                # Answering after the first iteration means earlier iterations requested tools
+                self._recent_tool_uses.append(int(step > 0))
+                return assistant_msg["content"]
 
             # 2.c) If tools requested, the user approves before they are called
             if print_all_output:
                 print("")
-            user_approval = input(f"The model wants to call {', '.join(tc.function.name for tc in tool_calls)}. Do you approve? (y/n): ").strip().lower()
+            self._prefetch_tools()
+            user_approval = (await ainput(f"The model wants to call {', '.join(tc.function.name for tc in tool_calls)}. Do you approve? (y/n): ")).strip().lower()
             if user_approval.lower() == 'y':
                 # 2.c) Execute each tool call and push a `role:"tool"` message for each
                 if print_all_output:
                     print("Number of tool calls:", len(tool_calls))
-                for tc in tool_calls:
-                    name = tc.function.name
-                    raw_args = tc.function.arguments
-
-                    tool_content = await self.execute_tool_call(tc, print_all_output=print_all_output)
-
-                    # Append the tool message (required fields)
-                    messages.append({
-                        "role": "tool",
-                        "tool_call_id": tc.id,
-                        "name": name,
-                        "content": tool_content
-                    })
-
-                    if print_all_output:
-                        print(f"[Tool call:] {name}({raw_args}) -> {tool_content}")
+                # Independent calls are started as tasks up front and their messages are built in call order
+                # as each one resolves; any side-effecting command keeps the batch sequential
+                sequential = any(tc.function.name in self._command_tools for tc in tool_calls)
+                tasks = [] if sequential else [
+                    asyncio.create_task(self.execute_tool_call(tc, print_all_output=print_all_output)) for tc in tool_calls
+                ]
+
+                try:
+                    for i, tc in enumerate(tool_calls):
+                        name = tc.function.name
+                        raw_args = tc.function.arguments
+                        try:
+                            tool_content = await (self.execute_tool_call(tc, print_all_output=print_all_output) if sequential else tasks[i])
+                        except Exception as e:
+                            tool_content = f"[tool_error] {e}"
+
+                        # Append the tool message (required fields)
+                        messages.append({
+                            "role": "tool",
+                            "tool_call_id": tc.id,
+                            "name": name,
+                            "content": tool_content
+                        })
+
+                        if print_all_output:
+                            print(f"[Tool call:] {name}({raw_args}) -> {tool_content}")
+                finally:
+                    # Never leave tool calls running in the background if this turn is interrupted
+                    for task in tasks:
+                        task.cancel()
             else:
-                user_request = "Tool call was not approved." + input("Please guide the model's next steps:")
+                user_request = "Tool call was not approved." + await ainput("Please guide the model's next steps:")
                 messages.append({"role": "user", "content": user_request})
 
 
@@ -268,7 +483,10 @@ class MCPClient:
             available_tools=None,                 # deactivate tools to force the model to conclude
             print_all_output=True
         )
+        messages.append(final_answer)
+        self._recent_tool_uses.append(1)
         print(f"Final Response Time: {time.time() - start:.2f} seconds")
+        return final_answer["content"]
 
 
     async def chat_loop(self):
@@ -278,15 +496,15 @@ class MCPClient:
         
         while True:
             try:
-                query = input("\nQuery: ").strip()
+                # Read the query off the event loop so MCP notifications keep being processed while waiting
+                self._prefetch_tools()
+                query = (await ainput("\nQuery: ")).strip()
                 start = time.time()
 
                 if query.lower() == 'quit':
                     break
 
-                model = os.getenv("MODEL")
-                print_all_output = os.getenv("PRINT_ALL_MODEL_OUTPUT", "False") == "True"
-                await self.process_query(query, model, print_all_output)
+                await self.process_query(query, self._model, self._print_all)
                 print(f"Response time: {time.time() - start:.2f} seconds")
                     
             except Exception as e:
@@ -295,6 +513,7 @@ class MCPClient:
     async def cleanup(self):
         """Clean up resources"""
         await self.exit_stack.aclose()
+        await self._http.aclose()
 
 async def main():
     transport = os.getenv("TRANSPORT", "stdio").lower()
@@ -327,5 +546,6 @@ async def main():
         await client.cleanup()
 
 if __name__ == "__main__":
-    import sys
-    asyncio.run(main())
\ No newline at end of file
+    loop_factory = uvloop.new_event_loop if uvloop is not None and sys.platform != "win32" else None
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(main())
\ No newline at end of file
@@ -1,62 +1,77 @@
 """Application configuration management."""
 
+import functools
 import os
+from dataclasses import dataclass
 from typing import Literal
 from dotenv import load_dotenv
 
 load_dotenv()
 
+@dataclass(frozen=True, slots=True)
 class Config:
     """Application configuration with validation."""
-    
+
     # Server settings
-    HOST: str = os.getenv("HOST", "localhost")
-    PORT: int = int(os.getenv("PORT", "8050"))
-    
+    HOST: str
+    PORT: int
+
     # Transport configuration
-    TRANSPORT: Literal["stdio", "sse", "streamable-http"] = os.getenv("TRANSPORT", "sse")
-    
+    TRANSPORT: Literal["stdio", "sse", "streamable-http"]
+
     # Client settings
-    MODEL: str = os.getenv("MODEL", "qwen3:8b")
-    
+    MODEL: str
+
     # API settings
-    REQUEST_TIMEOUT: int = int(os.getenv("REQUEST_TIMEOUT", "30"))
-    
+    REQUEST_TIMEOUT: int
+
     # Development settings
-    DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
-    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
-    
+    DEBUG: bool
+    LOG_LEVEL: str
+
     @classmethod
-    def validate(cls) -> None:
+    @functools.cache
+    def load(cls) -> "Config":
+        """Read the configuration from the environment once and return the shared instance."""
+        return cls(
+            HOST=os.getenv("HOST", "localhost"),
+            PORT=int(os.getenv("PORT", "8050")),
+            TRANSPORT=os.getenv("TRANSPORT", "sse"),
+            MODEL=os.getenv("MODEL", "qwen3:8b"),
+            REQUEST_TIMEOUT=int(os.getenv("REQUEST_TIMEOUT", "30")),
+            DEBUG=os.getenv("DEBUG", "false").lower() == "true",
+            LOG_LEVEL=os.getenv("LOG_LEVEL", "INFO"),
+        )
+
+    def validate(self) -> None:
         """Validate all configuration values."""
         errors = []
-        
-        if cls.TRANSPORT not in ["stdio", "sse", "streamable-http"]:
-            errors.append(f"Invalid transport: {cls.TRANSPORT}")
-        
-        if not (1024 <= cls.PORT <= 65535):
-            errors.append(f"Port must be between 1024-65535, got: {cls.PORT}")
-        
-        if cls.REQUEST_TIMEOUT <= 0:
-            errors.append(f"Request timeout must be positive, got: {cls.REQUEST_TIMEOUT}")
-        
-        if not cls.MODEL.strip():
+
+        if self.TRANSPORT not in ["stdio", "sse", "streamable-http"]:
+            errors.append(f"Invalid transport: {self.TRANSPORT}")
+
+        if not (1024 <= self.PORT <= 65535):
+            errors.append(f"Port must be between 1024-65535, got: {self.PORT}")
+
+        if self.REQUEST_TIMEOUT <= 0:
+            errors.append(f"Request timeout must be positive, got: {self.REQUEST_TIMEOUT}")
+
+        if not self.MODEL.strip():
             errors.append("MODEL cannot be empty")
-        
+
         if errors:
             raise ValueError("Configuration errors: " + "; ".join(errors))
-    
-    @classmethod
-    def display_config(cls) -> str:
+
+    def display_config(self) -> str:
         """Return a safe string representation of configuration."""
         return f"""
 CustomMCP Configuration:
-  Host: {cls.HOST}
-  Port: {cls.PORT}  
-  Transport: {cls.TRANSPORT}
-  Client model: {cls.MODEL}
-  Debug: {cls.DEBUG}
-  Log Level: {cls.LOG_LEVEL}
+  Host: {self.HOST}
+  Port: {self.PORT}
+  Transport: {self.TRANSPORT}
+  Client model: {self.MODEL}
+  Debug: {self.DEBUG}
+  Log Level: {self.LOG_LEVEL}
 """
 
-config = Config()
\ No newline at end of file
+config = Config.load()
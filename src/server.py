@@ -1,10 +1,24 @@
 from mcp.server.fastmcp import FastMCP, Context
 from dotenv import load_dotenv
+import asyncio
+import functools
 import logging
 import os
+import signal
 from config import config
-from tools import CalculatorTools, WeatherTools, TimeTools, LocationTools, WebSearch
-from typing import List, Dict, Any, Optional
+from tools import CalculatorTools, WeatherTools, TimeTools, LocationTools, WebSearch, SharedConnector
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Optional faster event loop: uvloop on Linux/macOS, winloop on Windows
+try:
+    import uvloop
+    _loop_factory = uvloop.new_event_loop
+except ImportError:
+    try:
+        import winloop
+        _loop_factory = winloop.new_event_loop
+    except ImportError:
+        _loop_factory = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -13,41 +27,40 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-def create_server() -> FastMCP:
-    """Create and configure the MCP server."""
-    server = FastMCP(
-        name="CustomMCP-Server",
-        description="Advanced MCP server with weather, calculator, and utility tools",
-        host=config.HOST,
-        port=config.PORT,
-        stateless_http=True,
-    )
-    
-    # Initialize tool handlers
-    calc_tools = CalculatorTools()
-    weather_tools = WeatherTools()
-    time_tools = TimeTools()
-    location_tools = LocationTools()
-    web_tools = WebSearch(brave_api_key=os.getenv("BRAVE_API_KEY"), logger=logger)
-    
-    # Register calculator tools
-    @server.tool()
-    def add(a: int, b: int) -> int:
-        """Add two numbers together."""
-        return calc_tools.add(a, b)
-    
-    @server.tool()
-    def subtract(a: int, b: int) -> int:
-        """Subtract second number from first."""
-        return calc_tools.subtract(a, b)
-    
-    @server.tool()
-    def multiply(a: int, b: int) -> int:
-        """Multiply two numbers."""
-        return calc_tools.multiply(a, b)
-    
-    # Register weather tools
+# Async cleanup callbacks (e.g. closing pooled HTTP sessions) run when the server stops
+_shutdown_callbacks: List[Callable[[], Awaitable[None]]] = []
+
+def safe_tool(label: str, on_error: Callable[..., Any]):
+    """Wrap an async tool so any exception is logged and returned as the tool's error payload.
+
+    Args:
+        label: Name used in the log line (e.g. "Forecast")
+        on_error: Called with the exception and the tool's keyword arguments, returns the error result
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                logger.error(f"{label} error: {e}")
+                return on_error(e, **kwargs)
+        return wrapper
+    return decorator
+
+def _register_calculator_tools(server: FastMCP, calc_tools: CalculatorTools) -> None:
+    """Register the calculator tools (bound methods are registered directly, no wrapper closure)."""
+    for fn, description in [
+        (calc_tools.add, "Add two numbers together."),
+        (calc_tools.subtract, "Subtract second number from first."),
+        (calc_tools.multiply, "Multiply two numbers."),
+    ]:
+        server.tool(description=description)(fn)
+
+def _register_weather_tools(server: FastMCP, weather_tools: WeatherTools) -> None:
+    """Register the NWS weather tools."""
     @server.tool()
+    @safe_tool("Forecast", lambda e, **_: f"Error retrieving forecast: {str(e)}")
     async def get_forecast(latitude: float, longitude: float) -> str:
         """Get weather forecast for a location in the US.
 
@@ -55,48 +68,44 @@ def create_server() -> FastMCP:
             latitude: Latitude coordinate (-90 to 90)
             longitude: Longitude coordinate (-180 to 180)
         """
-        try:
-            return await weather_tools.get_forecast(latitude, longitude)
-        except Exception as e:
-            logger.error(f"Forecast error: {e}")
-            return f"Error retrieving forecast: {str(e)}"
+        return await weather_tools.get_forecast(latitude, longitude)
     
     @server.tool()
+    @safe_tool("Alerts", lambda e, **_: f"Error retrieving alerts: {str(e)}")
     async def get_alerts(state: str) -> str:
         """Get weather alerts for a US state.
         
         Args:
             state: Two-letter US state code (e.g., CA, NY)
         """
-        try:
-            return await weather_tools.get_alerts(state.upper())
-        except Exception as e:
-            logger.error(f"Alerts error: {e}")
-            return f"Error retrieving alerts: {str(e)}"
-    
-    
+        return await weather_tools.get_alerts(state.upper())
+
+def _register_time_tools(server: FastMCP, time_tools: TimeTools) -> None:
+    """Register the time utility tools."""
     @server.tool()
-    async def get_time(ctx: Context) -> str:
+    def get_time(ctx: Context) -> str:
         """Get current UTC time in ISO format."""
-        return await time_tools.get_current_time()
-    
-    
+        return time_tools.get_current_time()
+
+def _register_location_tools(server: FastMCP, location_tools: LocationTools) -> None:
+    """Register the IP geolocation tools."""
     @server.tool()
+    @safe_tool("Location", lambda e, **_: {
+        'status': 'error',
+        'message': f"Error retrieving location: {str(e)}"
+    })
     async def get_location() -> dict:
         """Get current location using IP geolocation.
         
         Returns location information including coordinates, city, country, and timezone.
         """
-        try:
-            return await location_tools.get_location()
-        except Exception as e:
-            logger.error(f"Location error: {e}")
-            return {
-                'status': 'error',
-                'message': f"Error retrieving location: {str(e)}"
-            }
+        return await location_tools.get_location()
     
     @server.tool()
+    @safe_tool("IP location", lambda e, ip_address=None, **_: {
+        'status': 'error',
+        'message': f"Error retrieving location for IP {ip_address}: {str(e)}"
+    })
     async def get_location_by_ip(ip_address: str) -> dict:
         """Get location information for a specific IP address.
         
@@ -105,17 +114,15 @@ def create_server() -> FastMCP:
             
         Returns location information for the given IP address.
         """
-        try:
-            return await location_tools.get_location_by_ip(ip_address)
-        except Exception as e:
-            logger.error(f"IP location error: {e}")
-            return {
-                'status': 'error',
-                'message': f"Error retrieving location for IP {ip_address}: {str(e)}"
-            }
-    
-    
+        return await location_tools.get_location_by_ip(ip_address)
+
+def _register_web_tools(server: FastMCP, web_tools: WebSearch) -> None:
+    """Register the web search and URL fetch tools."""
     @server.tool()
+    @safe_tool("Web search", lambda e, **_: [{
+        'error': True,
+        'message': f"Web search failed: {str(e)}"
+    }])
     async def brave_search(keywords: str, max_results: int = 5, country: Optional[str] = "us") -> List[Dict[str, Any]]:
         """Search the web using BraveSearch API.
         
@@ -126,17 +133,15 @@ def create_server() -> FastMCP:
 
         Returns a list of search results with title, URL, and snippet.
         """
-        try:
-            return await web_tools.brave_search(keywords, max_results, country)
-        except Exception as e:
-            logger.error(f"Web search error: {e}")
-            return [{
-                'error': True,
-                'message': f"Web search failed: {str(e)}"
-            }]
+        return await web_tools.brave_search(keywords, max_results, country)
     
     
     @server.tool()
+    @safe_tool("URL fetch", lambda e, url=None, **_: {
+        'url': url,
+        'status': 'error',
+        'message': f"Failed to fetch URL: {str(e)}"
+    })
     async def fetch_url_content(url: str, max_length: int = 5000, mode: str = "readable") -> dict:
         """Fetch and extract text content from a URL.
         
@@ -145,18 +150,102 @@ def create_server() -> FastMCP:
             max_length: Maximum length of text content to return (default: 5000)
             mode: "readable" returns extracted article text ; "raw" returns HTML text
         """
-        try:
-            return await web_tools.fetch_url_content(url, max_length, mode)
-        except Exception as e:
-            logger.error(f"URL fetch error: {e}")
-            return {
-                'url': url,
-                'status': 'error',
-                'message': f"Failed to fetch URL: {str(e)}"
-            }
+        return await web_tools.fetch_url_content(url, max_length, mode)
+    
+    
+    @server.tool()
+    @safe_tool("Batch URL fetch", lambda e, urls=None, **_: [{
+        'url': u,
+        'status': 'error',
+        'message': f"Failed to fetch URL: {str(e)}"
+    } for u in (urls or [])])
+    async def fetch_urls_batch(urls: List[str], max_length: int = 5000, mode: str = "readable") -> List[dict]:
+        """Fetch and extract text content from several URLs concurrently.
+        Prefer this over calling fetch_url_content several times.
+        
+        Args:
+            urls: URLs to fetch content from
+            max_length: Maximum length of text content to return per URL (default: 5000)
+            mode: "readable" returns extracted article text ; "raw" returns HTML text
+        """
+        return await web_tools.fetch_url_contents(urls, max_length, mode)
+
+def create_server() -> FastMCP:
+    """Create and configure the MCP server."""
+    server = FastMCP(
+        name="CustomMCP-Server",
+        description="Advanced MCP server with weather, calculator, and utility tools",
+        host=config.HOST,
+        port=config.PORT,
+        stateless_http=True,
+    )
+    
+    # Initialize tool handlers
+    calc_tools = CalculatorTools()
+    weather_tools = WeatherTools()
+    time_tools = TimeTools()
+    # Location and web tools share one connection pool (DNS cache + keep-alive connections)
+    http_pool = SharedConnector()
+    location_tools = LocationTools(connector=http_pool)
+    _shutdown_callbacks.append(location_tools.aclose)
+    web_tools = WebSearch(brave_api_key=os.getenv("BRAVE_API_KEY"), logger=logger, connector=http_pool)
+    _shutdown_callbacks.append(web_tools.aclose)
+    _shutdown_callbacks.append(http_pool.aclose)
+    
+    _register_calculator_tools(server, calc_tools)
+    _register_weather_tools(server, weather_tools)
+    _register_time_tools(server, time_tools)
+    _register_location_tools(server, location_tools)
+    _register_web_tools(server, web_tools)
 
     return server
 
+async def serve(server: FastMCP, transport: str) -> None:
+    """Run the server on the given transport, then release tool resources on shutdown.
+    SIGTERM/SIGINT stop the server the same way, so the cleanup also runs when an MCP client
+    ends a stdio session by terminating the server process."""
+    if transport == "stdio":
+        run = server.run_stdio_async()
+    elif transport == "sse":
+        run = server.run_sse_async()
+    else:
+        run = server.run_streamable_http_async()
+
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    handled_signals = []
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+            handled_signals.append(sig)
+        except (NotImplementedError, RuntimeError):
+            # Not available on Windows event loops; the default handlers stay in place
+            pass
+
+    run_task = asyncio.create_task(run)
+    stop_task = asyncio.create_task(stop.wait())
+    try:
+        await asyncio.wait({run_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+        if run_task.done():
+            # Surface transport errors
+            run_task.result()
+        else:
+            logger.info("Shutdown signal received, stopping server")
+            run_task.cancel()
+            await asyncio.wait({run_task})
+    finally:
+        stop_task.cancel()
+        if not run_task.done():
+            run_task.cancel()
+            await asyncio.wait({run_task})
+        for sig in handled_signals:
+            loop.remove_signal_handler(sig)
+        for callback in _shutdown_callbacks:
+            try:
+                await callback()
+            except Exception as e:
+                logger.error(f"Shutdown cleanup failed: {e}")
+
 def main():
     """Main server entry point."""
     try:
@@ -166,7 +255,8 @@ def main():
         logger.info(f"Starting CustomMCP server on {config.HOST}:{config.PORT}")
         logger.info(f"Transport mode: {config.TRANSPORT}")
         
-        server.run(transport=config.TRANSPORT)
+        with asyncio.Runner(loop_factory=_loop_factory) as runner:
+            runner.run(serve(server, config.TRANSPORT))
         
     except Exception as e:
         logger.error(f"Server startup failed: {e}")
@@ -5,5 +5,6 @@ from .weather import WeatherTools
 from .time_utils import TimeTools
 from .location import LocationTools
 from .web_search import WebSearch
+from .connection_pool import SharedConnector
 
-__all__ = ["CalculatorTools", "WeatherTools", "TimeTools", "LocationTools", "WebSearch"]
\ No newline at end of file
+__all__ = ["CalculatorTools", "WeatherTools", "TimeTools", "LocationTools", "WebSearch", "SharedConnector"]
\ No newline at end of file
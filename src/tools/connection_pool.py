@@ -0,0 +1,34 @@
+"""Shared aiohttp connection pool for the HTTP-based tools."""
+
+import aiohttp
+from typing import Optional
+
+class SharedConnector:
+    """Lazily created TCPConnector shared by several tool handlers.
+
+    One pool means one DNS cache and one set of keep-alive connections for
+    Brave, ip-api and fetched pages. The connector is created on first use
+    because aiohttp requires a running event loop.
+    """
+
+    def __init__(self, limit: int = 200, limit_per_host: int = 20, ttl_dns_cache: int = 3600, happy_eyeballs_delay: float = 0.1):
+        self._kwargs = dict(
+            limit=limit,
+            limit_per_host=limit_per_host,
+            ttl_dns_cache=ttl_dns_cache,
+            use_dns_cache=True,
+            happy_eyeballs_delay=happy_eyeballs_delay,
+        )
+        self._connector: Optional[aiohttp.TCPConnector] = None
+
+    def get(self) -> aiohttp.TCPConnector:
+        """Return the shared connector, creating it on first use (inside the event loop)."""
+        if self._connector is None or self._connector.closed:
+            self._connector = aiohttp.TCPConnector(**self._kwargs)
+        return self._connector
+
+    async def aclose(self) -> None:
+        """Close the shared connector and its pooled connections."""
+        if self._connector is not None and not self._connector.closed:
+            await self._connector.close()
+        self._connector = None
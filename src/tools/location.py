@@ -1,15 +1,101 @@
 """Location tools implementation."""
 
+import asyncio
 import aiohttp
-import json
-from typing import Dict, Any, Optional
+import orjson
+from typing import Awaitable, Callable, Dict, Any, Optional
+from cachetools import TTLCache
+from .connection_pool import SharedConnector
+
+# ip-api endpoint; an empty ip looks up the caller's own public IP
+_IP_API_URL = "http://ip-api.com/json/{ip}?fields=status,message,country,city,lat,lon,timezone,query"
+_IP_API_SELF_URL = _IP_API_URL.format(ip="")
+
+# Per-request timeout for ip-api lookups
+IP_API_TIMEOUT = aiohttp.ClientTimeout(total=5)
+
+# Geolocation of a given IP rarely changes; the server's own IP may (VPN, DHCP), so it expires sooner
+IP_CACHE_TTL = 86400
+SELF_CACHE_TTL = 300
+SELF_KEY = "__self__"
 
 class LocationTools:
     """Location services for the MCP server."""
     
+    def __init__(self, connector: Optional[SharedConnector] = None):
+        # One pooled session for the server lifetime, created on first use;
+        # uses the shared connection pool when one is injected
+        self._connector = connector
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock = asyncio.Lock()
+        # Successful lookups only; ip-api rate-limits at 45 requests/minute
+        self._cache = TTLCache(maxsize=4096, ttl=IP_CACHE_TTL)
+        self._self_cache = TTLCache(maxsize=1, ttl=SELF_CACHE_TTL)
+        # Per-key locks so concurrent misses for the same IP trigger a single request
+        self._locks: Dict[str, asyncio.Lock] = {}
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            async with self._session_lock:
+                if self._session is None or self._session.closed:
+                    if self._connector is not None:
+                        self._session = aiohttp.ClientSession(connector=self._connector.get(), connector_owner=False)
+                    else:
+                        self._session = aiohttp.ClientSession(
+                            connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300, keepalive_timeout=60)
+                        )
+        return self._session
+    
+    async def _cached(self, key: str, cache: TTLCache, fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Return a cached lookup, or run fetch once for all concurrent callers and cache a success."""
+        if key in cache:
+            return cache[key]
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            if key in cache:
+                return cache[key]
+            try:
+                result = await fetch()
+            finally:
+                self._locks.pop(key, None)
+            if result.get('status') == 'success':
+                cache[key] = result
+            return result
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
     async def get_location(self) -> Dict[str, Any]:
         """Get current location using IP geolocation.
         
+        Results are cached for SELF_CACHE_TTL seconds and also stored under the resolved IP.
+        
+        Returns:
+            Dictionary containing location information (see _fetch_location)
+        """
+        result = await self._cached(SELF_KEY, self._self_cache, self._fetch_location)
+        if result.get('status') == 'success' and result.get('ip'):
+            self._cache[result['ip']] = result
+        return result
+    
+    async def get_location_by_ip(self, ip_address: str) -> Dict[str, Any]:
+        """Get location information for a specific IP address.
+        
+        Args:
+            ip_address: The IP address to geolocate
+            
+        Returns:
+            Dictionary containing location information for the given IP
+        """
+        return await self._cached(ip_address, self._cache, lambda: self._fetch_location_by_ip(ip_address))
+    
+    async def _fetch_location(self) -> Dict[str, Any]:
+        """Query ip-api for the location of the server's own public IP.
+        
         Returns:
             Dictionary containing location information including:
             - ip: IP address
@@ -21,39 +107,39 @@ class LocationTools:
         """
         try:
             # Use a free IP geolocation service
-            async with aiohttp.ClientSession() as session:
-                async with session.get('http://ip-api.com/json/?fields=status,message,country,city,lat,lon,timezone,query') as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        if data.get('status') == 'success':
-                            return {
-                                'ip': data.get('query'),
-                                'latitude': data.get('lat'),
-                                'longitude': data.get('lon'),
-                                'city': data.get('city'),
-                                'country': data.get('country'),
-                                'timezone': data.get('timezone'),
-                                'status': 'success'
-                            }
-                        else:
-                            return {
-                                'status': 'error',
-                                'message': data.get('message', 'Unknown error')
-                            }
+            session = await self._get_session()
+            async with session.get(_IP_API_SELF_URL, timeout=IP_API_TIMEOUT) as response:
+                if response.status == 200:
+                    data = orjson.loads(await response.read())
+                    
+                    if data.get('status') == 'success':
+                        return {
+                            'ip': data.get('query'),
+                            'latitude': data.get('lat'),
+                            'longitude': data.get('lon'),
+                            'city': data.get('city'),
+                            'country': data.get('country'),
+                            'timezone': data.get('timezone'),
+                            'status': 'success'
+                        }
                     else:
                         return {
                             'status': 'error',
-                            'message': f'HTTP error: {response.status}'
+                            'message': data.get('message', 'Unknown error')
                         }
+                else:
+                    return {
+                        'status': 'error',
+                        'message': f'HTTP error: {response.status}'
+                    }
         except Exception as e:
             return {
                 'status': 'error',
                 'message': f'Failed to get location: {str(e)}'
             }
     
-    async def get_location_by_ip(self, ip_address: str) -> Dict[str, Any]:
-        """Get location information for a specific IP address.
+    async def _fetch_location_by_ip(self, ip_address: str) -> Dict[str, Any]:
+        """Query ip-api for a specific IP address.
         
         Args:
             ip_address: The IP address to geolocate
@@ -62,32 +148,31 @@ class LocationTools:
             Dictionary containing location information for the given IP
         """
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f'http://ip-api.com/json/{ip_address}?fields=status,message,country,city,lat,lon,timezone,query'
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        if data.get('status') == 'success':
-                            return {
-                                'ip': data.get('query'),
-                                'latitude': data.get('lat'),
-                                'longitude': data.get('lon'),
-                                'city': data.get('city'),
-                                'country': data.get('country'),
-                                'timezone': data.get('timezone'),
-                                'status': 'success'
-                            }
-                        else:
-                            return {
-                                'status': 'error',
-                                'message': data.get('message', 'Invalid IP or location not found')
-                            }
+            session = await self._get_session()
+            async with session.get(_IP_API_URL.format(ip=ip_address), timeout=IP_API_TIMEOUT) as response:
+                if response.status == 200:
+                    data = orjson.loads(await response.read())
+                    
+                    if data.get('status') == 'success':
+                        return {
+                            'ip': data.get('query'),
+                            'latitude': data.get('lat'),
+                            'longitude': data.get('lon'),
+                            'city': data.get('city'),
+                            'country': data.get('country'),
+                            'timezone': data.get('timezone'),
+                            'status': 'success'
+                        }
                     else:
                         return {
                             'status': 'error',
-                            'message': f'HTTP error: {response.status}'
+                            'message': data.get('message', 'Invalid IP or location not found')
                         }
+                else:
+                    return {
+                        'status': 'error',
+                        'message': f'HTTP error: {response.status}'
+                    }
         except Exception as e:
             return {
                 'status': 'error',
@@ -1,13 +1,10 @@
-from datetime import datetime, timezone
-import asyncio
-
 """Time utility tools."""
 
+from datetime import datetime, timezone
+
 class TimeTools:
     """Time-related utilities for the MCP server."""
     
-    async def get_current_time(self) -> str:
+    def get_current_time(self) -> str:
         """Get current UTC time in ISO format."""
-        # Simulate async operation
-        await asyncio.sleep(0.001)
         return datetime.now(timezone.utc).isoformat()
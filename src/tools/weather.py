@@ -1,4 +1,5 @@
 import httpx
+import orjson
 from typing import Any
 
 
@@ -22,7 +23,7 @@ class WeatherTools:
             try:
                 response = await client.get(url, headers=headers, timeout=30.0)
                 response.raise_for_status()
-                return response.json()
+                return orjson.loads(response.content)
             except Exception as e:
                 return "Exception occurred while fetching data: " + str(e)
 
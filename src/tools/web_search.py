@@ -1,19 +1,320 @@
-from typing import Optional, List, Dict, Any
+import asyncio
+import codecs
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from typing import Optional, List, Dict, Any, Union
 
 import trafilatura
 
-from urllib.parse import urlparse
-
 import aiohttp
+import orjson
+from cachetools import LRUCache, TTLCache
+
+from .connection_pool import SharedConnector
+
+try:
+    import brotli  # noqa: F401 - lets aiohttp decode "br" responses
+    ACCEPT_ENCODING = "br, gzip, deflate"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+# Request headers are built once; per-call headers only copy them when something must be added
+FETCH_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,text/plain;q=0.9,*/*;q=0.8",
+    "Accept-Encoding": ACCEPT_ENCODING,
+}
+
+# Content types trafilatura can extract text from; in readable mode anything else is rejected before reading the body
+TEXT_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+# Query parameters that only track the click and never change the page; dropped when deduping results
+_TRACKING_PARAM_RE = re.compile(r"^(utm_\w+|gclid|fbclid|ref)$", re.IGNORECASE)
+_DEFAULT_PORTS = {"http": ":80", "https": ":443"}
+
+# Cheap scheme + host sanity check for fetch targets
+_URL_RE = re.compile(r"^https?://([^/?#\s]+)", re.IGNORECASE)
+
+# Upper bound on the HTML bytes handed to trafilatura, to bound per-page extraction work
+MAX_EXTRACT_HTML_BYTES = 2_000_000
+# Bytes downloaded per page are capped: raw mode needs at most 4 bytes per returned char,
+# readable mode reads 8x max_length but never less than MIN_READABLE_BYTES so the article body is reached
+MIN_READABLE_BYTES = 1024 * 1024
+# A Brave request still running after this many seconds gets one hedged duplicate
+BRAVE_HEDGE_DELAY = 0.5
+READ_CHUNK_SIZE = 64 * 1024
+# Per-host throttling and retries: 429/503 responses are retried after Retry-After (or exponential backoff),
+# unless the server asks for more than MAX_RETRY_DELAY seconds or the wait would leave less than
+# MIN_RETRY_BUDGET seconds of the fetch's overall timeout for the retry itself
+HOST_CONCURRENCY = 4
+RETRY_STATUSES = (429, 503)
+MAX_FETCH_RETRIES = 2
+RETRY_BACKOFF_BASE = 0.5
+MAX_RETRY_DELAY = 5.0
+MIN_RETRY_BUDGET = 1.0
+# Pages smaller than this are not worth a DOM parse in readable mode
+MIN_EXTRACT_BYTES = 1024
+EXTRACTION_FAILED = "Content extraction failed - the page may not contain readable text"
+# Caches are bounded by the bytes they hold, not entry count; ENTRY_OVERHEAD_BYTES approximates the dict/key cost
+CONTENT_CACHE_BYTES = 32 * 1024 * 1024
+VALIDATOR_CACHE_BYTES = 64 * 1024 * 1024
+ENTRY_OVERHEAD_BYTES = 512
+
+
+def _canon(url: str) -> str:
+    """
+    Canonical form of a result URL used as the dedupe key: lowercase scheme and host,
+    no default port, fragment or tracking parameters, and no trailing slash.
+    Malformed URLs (e.g. an unclosed IPv6 bracket) are returned unchanged.
+    """
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    default_port = _DEFAULT_PORTS.get(scheme)
+    if default_port and netloc.endswith(default_port):
+        netloc = netloc[:-len(default_port)]
+    path = parts.path.rstrip("/")
+    query = urlencode([
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not _TRACKING_PARAM_RE.match(k)
+    ])
+    return f"{scheme}://{netloc}{path}?{query}" if query else f"{scheme}://{netloc}{path}"
+
+
+def _looks_unreadable(body: bytes) -> bool:
+    """
+    Cheap bytes-level pre-check for pages trafilatura would only turn into the failure message:
+    tiny stubs (404s, redirects) and script-heavy shells with almost no markup (JS-only apps).
+    """
+    size = len(body)
+    if size < MIN_EXTRACT_BYTES:
+        return True
+    script_ratio = (body.count(b"<script") + body.count(b"<SCRIPT")) * 4096 / size
+    tag_ratio = body.count(b">") / size
+    return script_ratio > 0.5 and tag_ratio < 0.01
+
+
+def _retry_delay(retry_after: Optional[str], attempt: int) -> Optional[float]:
+    """
+    Seconds to wait before retrying: the server's Retry-After if given, else exponential backoff.
+    None when the server asks for more than MAX_RETRY_DELAY; retrying earlier would only invite another refusal.
+    """
+    delay = RETRY_BACKOFF_BASE * 2 ** attempt
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                pass
+    if delay > MAX_RETRY_DELAY:
+        return None
+    return max(delay, 0.0)
+
+
+def _codec_name(charset: Optional[str]) -> Optional[str]:
+    """Normalised codec name for a server-declared charset, or None when it is missing or unknown to Python."""
+    if not charset:
+        return None
+    try:
+        return codecs.lookup(charset).name
+    except LookupError:
+        return None
+
+
+def _is_extractable(content_type: str) -> bool:
+    """Whether readable mode can extract text from a response with this content-type (missing is attempted)."""
+    ct = content_type.lower()
+    return not ct or any(t in ct for t in TEXT_CONTENT_TYPES)
+
+
+def _truncate(text: str, max_length: int) -> str:
+    """Cut text to max_length characters, marking the cut."""
+    if len(text) > max_length:
+        return text[:max_length] + "... [truncated]"
+    return text
+
+
+def _init_extract_worker(server_alive) -> None:
+    """
+    Pool worker initializer: exit as soon as the server process is gone. server_alive is the read end
+    of a pipe whose only writer is the server, so it reaches EOF when the server exits, even on SIGKILL.
+    Without this, workers (children of the forkserver, holding the server's inherited pipes) outlive it.
+    """
+    def _watch() -> None:
+        try:
+            server_alive.recv_bytes()
+        except (EOFError, OSError):
+            pass
+        os._exit(0)
+
+    threading.Thread(target=_watch, name="server-watch", daemon=True).start()
+
+
+def _extract_worker(html: Union[bytes, str], url: str, include_links: bool, include_images: bool, max_length: int) -> str:
+    """
+    Run trafilatura in a worker process and return the truncated text,
+    so only max_length characters travel back to the server process.
+    """
+    extracted = trafilatura.extract(
+        html,
+        include_comments=False,
+        include_links=include_links,
+        include_images=include_images,
+        url=url,
+        favor_precision=True,
+        # Skip the justext/readability fallback passes
+        fast=True,
+    )
+    if not extracted:
+        return EXTRACTION_FAILED
+    return _truncate(extracted, max_length)
 
 
 class WebSearch:
-    def __init__(self, brave_api_key: str, proxy: Optional[str] = None, timeout: int = 20, logger=None):
+    def __init__(self, brave_api_key: str, proxy: Optional[str] = None, timeout: int = 20, logger=None, max_download_bytes: int = 5 * 1024 * 1024, connector: Optional[SharedConnector] = None):
         self.brave_api_key = brave_api_key
+        self._brave_headers = {
+            "X-Subscription-Token": brave_api_key,
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip",
+            "User-Agent": "ServerMCP/1.0",
+        }
         self.proxy = proxy
         self.timeout = timeout
+        # Pages advertising a larger Content-Length are rejected before download
+        self.max_download_bytes = max_download_bytes
+        # Shared connection pool, if injected; otherwise the session owns its own connector
+        self._connector = connector
         self.logger = logger
+        # One pooled session shared by Brave and URL fetches, created on first use
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock = asyncio.Lock()
+        # trafilatura is CPU-bound and holds the GIL; it runs in worker processes instead of on the event loop
+        self._extract_pool: Optional[ProcessPoolExecutor] = None
+        # Pipe watched by the pool workers; closing (or losing) the write end makes them exit
+        self._workers_alive = None
+        # Successful fetch results keyed by (url, max_length, mode, include_links, include_images)
+        self._content_cache = TTLCache(
+            maxsize=CONTENT_CACHE_BYTES, ttl=600,
+            getsizeof=lambda r: len(r['content']) + ENTRY_OVERHEAD_BYTES,
+        )
+        # Last body + ETag/Last-Modified per URL, to revalidate expired entries with a conditional GET
+        self._validators = LRUCache(
+            maxsize=VALIDATOR_CACHE_BYTES,
+            getsizeof=lambda v: len(v['body']) + ENTRY_OVERHEAD_BYTES,
+        )
+        # Per-key locks so concurrent misses for the same URL trigger a single fetch
+        self._fetch_locks: Dict[tuple, asyncio.Lock] = {}
+        # Per-host semaphores limiting concurrent page fetches to one server
+        self._host_sems = LRUCache(maxsize=1024)
+        # Successful Brave results keyed by the full query parameters, with the same per-key coalescing
+        self._search_cache = TTLCache(maxsize=256, ttl=300)
+        self._search_locks: Dict[tuple, asyncio.Lock] = {}
+
+    def _get_extract_pool(self) -> ProcessPoolExecutor:
+        """Return the extraction process pool, creating it on first use."""
+        if self._extract_pool is None:
+            # Never fork: the server process already runs event-loop and anyio worker threads
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            ctx = multiprocessing.get_context(start_method)
+            # The read end stays open here too: workers are started lazily and each one receives a copy
+            self._workers_alive = ctx.Pipe(duplex=False)
+            self._extract_pool = ProcessPoolExecutor(
+                max_workers=min(8, os.cpu_count() or 1),
+                mp_context=ctx,
+                initializer=_init_extract_worker,
+                initargs=(self._workers_alive[0],),
+            )
+        return self._extract_pool
+
+    async def _extract(self, *args) -> str:
+        """
+        Run _extract_worker in the process pool. If a worker died (OOM, parser crash) the pool is broken
+        for good, so it is discarded and the extraction retried once on a fresh pool.
+        """
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            pool = self._get_extract_pool()
+            try:
+                return await loop.run_in_executor(pool, _extract_worker, *args)
+            except BrokenProcessPool:
+                if self._extract_pool is pool:
+                    self._discard_extract_pool()
+                if attempt:
+                    raise
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            async with self._session_lock:
+                if self._session is None or self._session.closed:
+                    self._session = aiohttp.ClientSession(
+                        timeout=aiohttp.ClientTimeout(total=self.timeout),
+                        auto_decompress=True,
+                        connector=self._connector.get() if self._connector is not None else aiohttp.TCPConnector(limit=200, limit_per_host=10, ttl_dns_cache=300, use_dns_cache=True),
+                        connector_owner=self._connector is None,
+                    )
+        return self._session
+
+    def _host_sem(self, host: str) -> asyncio.Semaphore:
+        """Return the fetch semaphore for host, creating it on first use."""
+        sem = self._host_sems.get(host)
+        if sem is None:
+            sem = self._host_sems[host] = asyncio.Semaphore(HOST_CONCURRENCY)
+        return sem
 
+    async def _hedged(self, make_request, delay: float):
+        """
+        Run make_request(); if it is still running after `delay` seconds, start one duplicate
+        and return the first successful result. The loser is cancelled.
+        make_request must raise on failure: any returned value counts as success.
+        A request that fails before the hedge delay raises at once and is not duplicated.
+        """
+        primary = asyncio.create_task(make_request())
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+        pending = {primary, asyncio.create_task(make_request())}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            # Both attempts failed: report the original request's error
+            raise primary.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP session and the extraction process pool."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._discard_extract_pool()
+
+    def _discard_extract_pool(self) -> None:
+        """Shut the extraction pool down and close its liveness pipe, so no worker outlives it."""
+        if self._extract_pool is not None:
+            self._extract_pool.shutdown(wait=False, cancel_futures=True)
+            self._extract_pool = None
+        if self._workers_alive is not None:
+            for conn in self._workers_alive:
+                conn.close()
+            self._workers_alive = None
 
     async def brave_search(
         self,
@@ -41,9 +342,44 @@ class WebSearch:
 
         Returns:
             List of dicts with {title, url, snippet, source}
+
+        Successful results are cached for 5 minutes; concurrent identical searches share one request.
         """
         # Brave caps per call
         count = min(max_results, 20)
+        offset = max(0, offset)
+
+        key = (keywords, count, country, safesearch, freshness, search_lang, mode, offset)
+        cached = self._search_cache.get(key)
+        if cached is not None:
+            return list(cached)
+
+        lock = self._search_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            cached = self._search_cache.get(key)
+            if cached is not None:
+                return list(cached)
+            try:
+                results = await self._brave_search(keywords, count, country, safesearch, freshness, search_lang, mode, offset)
+            finally:
+                self._search_locks.pop(key, None)
+            if not (results and results[0].get("source") == "error"):
+                self._search_cache[key] = results
+            return list(results)
+
+
+    async def _brave_search(
+        self,
+        keywords: str,
+        count: int,
+        country: Optional[str],
+        safesearch: str,
+        freshness: Optional[str],
+        search_lang: Optional[str],
+        mode: str,
+        offset: int
+    ) -> List[Dict[str, Any]]:
+        """Send one Brave API request and normalise its results."""
 
         # Endpoint selection
         base = "https://api.search.brave.com/res/v1"
@@ -55,7 +391,7 @@ class WebSearch:
         params = {
             "q": keywords,
             "count": count,
-            "offset": max(0, offset),
+            "offset": offset,
             "safesearch": safesearch,
         }
         if country:
@@ -65,55 +401,48 @@ class WebSearch:
         if search_lang:
             params["search_lang"] = search_lang
 
-        headers = {
-            "X-Subscription-Token": self.brave_api_key,
-            "Accept": "application/json",
-            "Accept-Encoding": "gzip",
-            "User-Agent": "ServerMCP/1.0",
-        }
-
-        timeout = aiohttp.ClientTimeout(total=self.timeout)
-
         try:
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(url, headers=headers, params=params, proxy=self.proxy) as resp:
-                    text = await resp.text()
+            session = await self._get_session()
+
+            async def _do():
+                async with session.get(url, headers=self._brave_headers, params=params, proxy=self.proxy) as resp:
+                    body = await resp.read()
                     if resp.status != 200:
+                        # Raised, not returned, so a fast error (e.g. a 429 on the hedge) never beats a pending 200;
                         # surface the body for debugging
-                        raise RuntimeError(f"Brave API error {resp.status}: {text}")
+                        raise RuntimeError(f"Brave API error {resp.status}: {body.decode('utf-8', errors='replace')}")
+                    return body
 
-                    data = await resp.json()
+            # Idempotent GET: hedge the tail with at most one extra request
+            body = await self._hedged(_do, BRAVE_HEDGE_DELAY)
 
-            # Normalize
-            results: List[Dict[str, Any]] = []
-            seen = set()
+            data = orjson.loads(body)
 
+            # Normalize and dedupe by canonical URL in a single pass (first occurrence wins, order preserved)
             if mode == "news":
-                items = (data.get("results") or [])  # news top-level is "results"
-                for it in items:
-                    link = it.get("url") or ""
-                    if not link or link in seen:
-                        continue
-                    seen.add(link)
-                    results.append({
-                        "title": it.get("title", "").strip(),
-                        "url": link,
-                        "snippet": (it.get("description") or "").strip(),
-                        "source": "brave_news"
-                    })
+                items = data.get("results") or []  # news top-level is "results"
+                source = "brave_news"
             else:
-                items = (data.get("web", {}) or {}).get("results", [])
-                for it in items:
-                    link = it.get("url") or ""
-                    if not link or link in seen:
-                        continue
-                    seen.add(link)
-                    results.append({
-                        "title": it.get("title", "").strip(),
+                items = (data.get("web") or {}).get("results") or []
+                source = "brave"
+
+            # Hot loop: module-level helpers and methods bound to locals
+            unique: Dict[str, Dict[str, Any]] = {}
+            canon = _canon
+            for it in items:
+                get = it.get
+                link = get("url")
+                if not link:
+                    continue
+                key = canon(link)
+                if key not in unique:
+                    unique[key] = {
+                        "title": (get("title") or "").strip(),
                         "url": link,
-                        "snippet": (it.get("description") or "").strip(),
-                        "source": "brave"
-                    })
+                        "snippet": (get("description") or "").strip(),
+                        "source": source
+                    }
+            results: List[Dict[str, Any]] = list(unique.values())
 
             if callable(getattr(self.logger, "info", None)):
                 self.logger.info(f"Brave search returned {len(results)} unique results for: {keywords}")
@@ -142,46 +471,138 @@ class WebSearch:
         """
         Fetch and extract content from a URL.
         Readable mode only returns textual content.
+        Successful results are cached for 10 minutes; concurrent calls for the same URL share one fetch.
+        """
+        key = (url, max_length, mode, include_links, include_images)
+        cached = self._content_cache.get(key)
+        if cached is not None:
+            return cached
+
+        lock = self._fetch_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            cached = self._content_cache.get(key)
+            if cached is not None:
+                return cached
+            try:
+                result = await self._fetch_url_content(url, max_length, mode, include_links, include_images)
+            finally:
+                self._fetch_locks.pop(key, None)
+            if result.get('status') == 'success' and self._content_cache.getsizeof(result) <= CONTENT_CACHE_BYTES:
+                self._content_cache[key] = result
+            return result
+
+
+    async def _fetch_url_content(
+        self,
+        url: str,
+        max_length: int,
+        mode: str,
+        include_links: bool,
+        include_images: bool
+    ) -> Dict[str, Any]:
+        """
+        Download and extract a URL, revalidating with If-None-Match / If-Modified-Since
+        when a previous response for it is known.
         """
         try:
-            parsed = urlparse(url)
-            if not parsed.scheme or not parsed.netloc:
-                return {
-                    'url': url,
-                    'status': 'error',
-                    'content': 'Invalid URL format',
-                    'length': 0,
-                    'error': 'Invalid URL format'
-                }
-
-            timeout = aiohttp.ClientTimeout(total=self.timeout)
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            }
+            match = _URL_RE.match(url)
+            if not match:
+                return self._fetch_error(url, 'Invalid URL format')
 
-            async with aiohttp.ClientSession(timeout=timeout, headers=headers) as session:
-                async with session.get(url, allow_redirects=True, ssl=False, proxy=self.proxy) as response:
-                    response.raise_for_status()
-                    html = await response.text()
-                    final_url = str(response.url)
-                    content_type = response.headers.get('content-type', '')
-
-            if mode == "readable":
-                extracted = trafilatura.extract(
-                    html,
-                    include_comments=False,
-                    include_links=include_links,
-                    include_images=include_images,
-                    url=final_url,
-                    favor_precision=True,
+            headers = FETCH_HEADERS
+            validator = self._validators.get(url)
+            if validator is not None:
+                headers = dict(FETCH_HEADERS)
+                if validator['etag']:
+                    headers["If-None-Match"] = validator['etag']
+                if validator['last_modified']:
+                    headers["If-Modified-Since"] = validator['last_modified']
+
+            session = await self._get_session()
+            host = match.group(1).lower()
+            loop = asyncio.get_running_loop()
+            # Retries share one self.timeout budget with the first attempt, so a retried fetch
+            # still reports its 429/503 instead of running into the batch's per-URL deadline
+            started = loop.time()
+            delay = 0.0
+            request_timeout = None  # first attempt: the session's timeout
+            for attempt in range(MAX_FETCH_RETRIES + 1):
+                if delay:
+                    await asyncio.sleep(delay)
+                    request_timeout = aiohttp.ClientTimeout(total=self.timeout - (loop.time() - started))
+                # At most HOST_CONCURRENCY requests in flight per host, so batches do not burst one server
+                async with self._host_sem(host):
+                    async with session.get(url, headers=headers, allow_redirects=True, ssl=False, proxy=self.proxy, timeout=request_timeout) as response:
+                        if response.status in RETRY_STATUSES and attempt < MAX_FETCH_RETRIES:
+                            delay = _retry_delay(response.headers.get('Retry-After'), attempt)
+                            # Retry only if the wait leaves time for another attempt within the budget
+                            if delay is not None and loop.time() - started + delay + MIN_RETRY_BUDGET < self.timeout:
+                                continue
+                            # Otherwise report the 429/503 as is
+                        response.raise_for_status()
+                        if response.status == 304 and validator is not None:
+                            # Not modified: reuse the body from the previous fetch
+                            body = validator['body']
+                            charset = validator['charset']
+                            final_url = validator['final_url']
+                            content_type = validator['content_type']
+                            # The stored body may come from a raw-mode fetch of a non-text type
+                            if mode == "readable" and not _is_extractable(content_type):
+                                return self._fetch_error(url, f"Unsupported content-type: {content_type.lower()}")
+                        else:
+                            # Fail fast on bodies that cannot be extracted or are too large, without downloading them;
+                            # raw mode returns the body as is, so any content type is accepted there
+                            ct = response.headers.get('content-type', '')
+                            if mode == "readable" and not _is_extractable(ct):
+                                return self._fetch_error(url, f"Unsupported content-type: {ct.lower()}")
+                            if response.content_length is not None and response.content_length > self.max_download_bytes:
+                                return self._fetch_error(url, f"Content too large: {response.content_length} bytes")
+
+                            max_bytes = max(max_length * 8, MIN_READABLE_BYTES) if mode == "readable" else max_length * 4
+                            # Bodies without a Content-Length (chunked) are held to the same download limit
+                            max_bytes = min(max_bytes, self.max_download_bytes)
+                            buf = bytearray()
+                            body_capped = False
+                            async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+                                buf += chunk
+                                if len(buf) >= max_bytes:
+                                    body_capped = True
+                                    del buf[max_bytes:]
+                                    break
+                            # Kept as bytes: trafilatura decodes itself, so only raw mode pays for a decode here
+                            body = bytes(buf)
+                            # Unknown or bogus charsets fall back to trafilatura's detection / utf-8
+                            charset = _codec_name(response.charset)
+                            final_url = str(response.url)
+                            content_type = response.headers.get('content-type', '')
+                            etag = response.headers.get('ETag')
+                            last_modified = response.headers.get('Last-Modified')
+                            # Only complete bodies can be reused on a 304, whatever max_length the next call uses
+                            if (etag or last_modified) and not body_capped and len(body) + ENTRY_OVERHEAD_BYTES <= VALIDATOR_CACHE_BYTES:
+                                self._validators[url] = {
+                                    'etag': etag,
+                                    'last_modified': last_modified,
+                                    'body': body,
+                                    'charset': charset,
+                                    'final_url': final_url,
+                                    'content_type': content_type,
+                                }
+                break
+
+            if mode == "readable" and _looks_unreadable(body[:MAX_EXTRACT_HTML_BYTES]):
+                extracted = EXTRACTION_FAILED
+            elif mode == "readable":
+                extracted = await self._extract(
+                    # A declared non-UTF-8 charset is applied here; otherwise trafilatura detects it
+                    body[:MAX_EXTRACT_HTML_BYTES] if charset in (None, "utf-8")
+                    else body[:MAX_EXTRACT_HTML_BYTES].decode(charset, errors="replace"),
+                    final_url,
+                    include_links,
+                    include_images,
+                    max_length,
                 )
-                if not extracted:
-                    extracted = "Content extraction failed - the page may not contain readable text"
             else:
-                extracted = html
-
-            if extracted and len(extracted) > max_length:
-                extracted = extracted[:max_length] + "... [truncated]"
+                extracted = _truncate(body.decode(charset or "utf-8", errors="replace"), max_length)
 
             return {
                 'url': url,
@@ -197,14 +618,55 @@ class WebSearch:
             error_msg = f"HTTP error: {str(e)}"
             if callable(getattr(self.logger, "error", None)):
                 self.logger.error(f"Failed to fetch {url}: {error_msg}")
-            return {
-                'url': url,
-                'status': 'error',
-                'content': error_msg,
-                'length': 0,
-                'error': error_msg
-            }
+            return self._fetch_error(url, error_msg)
         except Exception as e:
             error_msg = f"Unexpected error: {str(e)}"
             if callable(getattr(self.logger, "error", None)):
-                self.logger.error(f"Failed to fetch {url}: {error_msg}")
\ No newline at end of file
+                self.logger.error(f"Failed to fetch {url}: {error_msg}")
+            return self._fetch_error(url, error_msg)
+
+
+    def _fetch_error(self, url: str, error_msg: str) -> Dict[str, Any]:
+        """Build the error result returned by fetch_url_content."""
+        return {
+            'url': url,
+            'status': 'error',
+            'content': error_msg,
+            'length': 0,
+            'error': error_msg
+        }
+
+
+    async def fetch_url_contents(
+        self,
+        urls: List[str],
+        max_length: int = 5000,
+        mode: str = "readable",
+        max_concurrency: int = 5,
+        include_links: bool = False,
+        include_images: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch several URLs concurrently, at most max_concurrency at a time.
+        Returns one fetch_url_content result per URL, in the same order as urls.
+        Duplicate URLs in the batch share a single fetch.
+        Each URL gets timeout + 2 seconds; a URL that takes longer returns an error result.
+        """
+        sem = asyncio.Semaphore(max(1, max_concurrency))
+        # Per-URL deadline (counted once a slot is acquired) so one slow host cannot hold up the batch
+        deadline = self.timeout + 2
+
+        async def _one(u: str) -> Dict[str, Any]:
+            try:
+                async with sem:
+                    async with asyncio.timeout(deadline):
+                        return await self.fetch_url_content(u, max_length, mode, include_links, include_images)
+            except TimeoutError:
+                return self._fetch_error(u, f"Timed out after {deadline}s")
+            except Exception as e:
+                return self._fetch_error(u, f"Unexpected error: {str(e)}")
+
+        unique_urls = list(dict.fromkeys(urls))
+        async with asyncio.TaskGroup() as tg:
+            tasks = {u: tg.create_task(_one(u)) for u in unique_urls}
+        return [tasks[u].result() for u in urls]